@@ -1,11 +1,15 @@
+import asyncio
 import os
 import sqlite3
-from datetime import datetime
-from typing import Optional, Tuple
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional, Set, Tuple
 
-from fastapi import FastAPI, Request, Form
-from fastapi.responses import HTMLResponse, RedirectResponse
+from fastapi import Cookie, Depends, FastAPI, Request, Form, Path
+from fastapi.responses import HTMLResponse, PlainTextResponse, Response, StreamingResponse
 from fastapi.templating import Jinja2Templates
+from jinja2 import FileSystemBytecodeCache
 
 # -----------------------------
 # Config
@@ -14,28 +18,154 @@ APP_TITLE = "EulerQ Candidate Test"
 DB = os.getenv("DB_PATH", "submissions.db")
 ADMIN_KEY = os.getenv("ADMIN_KEY", "EULERQ123")  # set in Railway Variables for security
 COOKIE_NAME = "candidate_name"
+MAX_CONTENT_CHARS = 100_000  # per submitted answer
+# Form-encoding can turn one character into up to 12 bytes (%XX per UTF-8
+# byte), so this is the most a legitimate submit body can need.
+MAX_BODY_BYTES = MAX_CONTENT_CHARS * 12 + 1024
 
 templates = Jinja2Templates(directory="templates")
+TEMPLATE_NAMES = (
+    "index.html",
+    "part_a.html",
+    "part_b.html",
+    "part_c.html",
+    "part_d.html",
+    "part_e.html",
+    "finalize.html",
+    "submitted.html",
+    "admin_submissions.html",
+)
 app = FastAPI(title=APP_TITLE)
 
 # -----------------------------
 # DB helpers
 # -----------------------------
-def init_db():
-    conn = sqlite3.connect(DB)
-    cur = conn.cursor()
+def _configure(conn: sqlite3.Connection, persistent: bool = False) -> sqlite3.Connection:
+    # journal_mode is stored in the DB file, so it only needs setting once;
+    # the rest are per-connection and must be applied on every connect.
+    # Set first so concurrent workers starting up wait on each other's locks
+    conn.execute("PRAGMA busy_timeout=5000")
+    if persistent:
+        conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute("PRAGMA mmap_size=268435456")  # 256 MB
+    conn.execute("PRAGMA cache_size=-65536")  # 64 MB
+    return conn
+
+
+# Hot SQL kept as module constants so every call hands the connection's
+# statement cache the same string and skips re-preparing it.
+SQL_INSERT_SUB = """
+    INSERT INTO submissions(candidate_name, part, created_at, content, id)
+    SELECT :candidate, :part, :created_at, :content, COALESCE(MAX(id), 0) + 1
+    FROM submissions
+    WHERE candidate_name=:candidate AND part=:part AND created_at=:created_at
+"""
+# "Is the latest submission for each part non-blank", in one pass. Latest is
+# (created_at DESC, id DESC), the same order load_part_state uses.
+SQL_SUBMITTED_PARTS = """
+    SELECT part, non_blank
+    FROM (
+        SELECT part,
+               trim(content, char(32, 9, 10, 11, 12, 13)) != '' AS non_blank,
+               ROW_NUMBER() OVER (PARTITION BY part ORDER BY created_at DESC, id DESC) AS rn
+        FROM submissions
+        WHERE candidate_name=? AND part IN ('A', 'B', 'C', 'D')
+    )
+    WHERE rn = 1
+"""
+# Latest submission for a part plus the finalize flag in one round-trip. The
+# LEFT JOIN off a one-row seed keeps a row even when nothing is submitted yet.
+SQL_PART_STATE = """
+    SELECT s.content, s.created_at,
+           EXISTS(SELECT 1 FROM final_submissions WHERE candidate_name=?)
+    FROM (SELECT 1)
+    LEFT JOIN (
+        SELECT content, created_at
+        FROM submissions
+        WHERE candidate_name=? AND part=?
+        ORDER BY created_at DESC, id DESC
+        LIMIT 1
+    ) s ON 1
+"""
+SQL_IS_FINAL = "SELECT 1 FROM final_submissions WHERE candidate_name=? LIMIT 1"
+SQL_INS_FINAL = (
+    "INSERT OR IGNORE INTO final_submissions(candidate_name, finalized_at) VALUES (?, ?)"
+)
+SQL_ADMIN_LIST = """
+    SELECT candidate_name, part, created_at, content
+    FROM submissions
+    ORDER BY created_at DESC
+    LIMIT 200
+"""
+
+# One shared connection for the whole process (autocommit mode). sqlite3
+# connections aren't safe for concurrent use, so every access holds _LOCK.
+_CONN: Optional[sqlite3.Connection] = None
+_LOCK = threading.Lock()
+
+# Finalizing is one-way, so once a candidate is seen as finalized we never
+# need to ask the DB again. Per-process only: another worker's finalize is
+# just a cache miss that falls through to the query.
+_FINALIZED: Set[str] = set()
+
+
+# Bumped whenever _migrate() learns a new step; stored in PRAGMA user_version
+SCHEMA_VERSION = 1
+
+
+def _migrate(conn: sqlite3.Connection):
+    # IMMEDIATE so that concurrent workers starting up migrate one at a time;
+    # user_version is re-read inside the transaction for the same reason.
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if version < 1:
+            # v1: submissions becomes a WITHOUT ROWID table clustered on the
+            # (candidate, part, newest-first) order every lookup uses. id only
+            # breaks ties between rows saved in the same second.
+            conn.execute("""
+            CREATE TABLE submissions_v1 (
+                candidate_name TEXT NOT NULL,
+                part TEXT NOT NULL,
+                created_at TEXT NOT NULL,
+                content TEXT NOT NULL,
+                id INTEGER NOT NULL,
+                PRIMARY KEY (candidate_name, part, created_at DESC, id DESC)
+            ) WITHOUT ROWID
+            """)
+            has_old = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type='table' AND name='submissions'"
+            ).fetchone()
+            if has_old:
+                conn.execute("""
+                INSERT INTO submissions_v1(candidate_name, part, created_at, content, id)
+                SELECT candidate_name, part, created_at, content, id FROM submissions
+                """)
+                conn.execute("DROP TABLE submissions")
+            conn.execute("ALTER TABLE submissions_v1 RENAME TO submissions")
+        conn.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+        conn.execute("COMMIT")
+    except BaseException:
+        # Same as _write_txn: a failed COMMIT may leave the transaction open
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        raise
 
-    cur.execute("""
-    CREATE TABLE IF NOT EXISTS submissions (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        candidate_name TEXT NOT NULL,
-        part TEXT NOT NULL,
-        content TEXT NOT NULL,
-        created_at TEXT NOT NULL
+
+def init_db():
+    global _CONN
+    conn = _configure(
+        sqlite3.connect(
+            DB, check_same_thread=False, isolation_level=None, cached_statements=256
+        ),
+        persistent=True,
     )
-    """)
 
-    cur.execute("""
+    _migrate(conn)
+
+    conn.execute("""
     CREATE TABLE IF NOT EXISTS final_submissions (
         id INTEGER PRIMARY KEY AUTOINCREMENT,
         candidate_name TEXT NOT NULL UNIQUE,
@@ -43,75 +173,128 @@ def init_db():
     )
     """)
 
-    conn.commit()
-    conn.close()
+    _FINALIZED.clear()
+    _CONN = conn
+
+
+@contextmanager
+def _write_txn():
+    # Explicit transaction on the autocommit connection; IMMEDIATE takes the
+    # write lock up front instead of upgrading mid-transaction.
+    with _LOCK:
+        _CONN.execute("BEGIN IMMEDIATE")
+        try:
+            yield _CONN
+            _CONN.execute("COMMIT")
+        except BaseException:
+            # COMMIT itself can fail (disk full, I/O error); SQLite may or may
+            # not have rolled back already, so only roll back if still open.
+            # Otherwise the shared connection would stay stuck in a transaction.
+            if _CONN.in_transaction:
+                _CONN.execute("ROLLBACK")
+            raise
+
+
+def _open_reader() -> sqlite3.Connection:
+    return _configure(sqlite3.connect(DB, check_same_thread=False))
+
+
+def close_db():
+    global _CONN
+    with _LOCK:
+        if _CONN is not None:
+            _CONN.close()
+            _CONN = None
+
+
+# (epoch second, formatted) - timestamps only have second resolution, so
+# reformat at most once a second. Swapped as one tuple to stay thread-safe.
+_NOW_CACHE: Tuple[int, str] = (0, "")
 
 
 def now_iso() -> str:
-    return datetime.now().isoformat(timespec="seconds")
+    global _NOW_CACHE
+    t = int(time.time())
+    cached_t, cached = _NOW_CACHE
+    if t != cached_t:
+        cached = time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(t))
+        _NOW_CACHE = (t, cached)
+    return cached
+
+
+# Redirect targets are a handful of fixed paths, so their header dicts are
+# built once and shared instead of going through RedirectResponse each time.
+_REDIRECT_HEADERS: Dict[str, Dict[str, str]] = {}
+
 
+def see_other(url: str) -> Response:
+    headers = _REDIRECT_HEADERS.get(url)
+    if headers is None:
+        headers = _REDIRECT_HEADERS.setdefault(url, {"location": url})
+    return Response(status_code=303, headers=headers)
 
-def get_candidate(request: Request) -> str:
-    return (request.cookies.get(COOKIE_NAME) or "").strip()
+
+def get_candidate(candidate_name: Optional[str] = Cookie(None, alias=COOKIE_NAME)) -> str:
+    return (candidate_name or "").strip()
+
+
+class CandidateRequired(Exception):
+    pass
+
+
+def require_candidate(candidate: str = Depends(get_candidate)) -> str:
+    if not candidate:
+        raise CandidateRequired()
+    return candidate
 
 
 def save_submission(candidate: str, part: str, content: str):
-    conn = sqlite3.connect(DB)
-    cur = conn.cursor()
-    cur.execute(
-        "INSERT INTO submissions(candidate_name, part, content, created_at) VALUES (?, ?, ?, ?)",
-        (candidate.strip(), part.strip(), content, now_iso()),
-    )
-    conn.commit()
-    conn.close()
+    with _write_txn() as conn:
+        conn.execute(
+            SQL_INSERT_SUB,
+            {
+                "candidate": candidate.strip(),
+                "part": part.strip(),
+                "created_at": now_iso(),
+                "content": content,
+            },
+        )
 
 
-def get_latest_submission(candidate: str, part: str) -> Tuple[Optional[str], Optional[str]]:
-    conn = sqlite3.connect(DB)
-    cur = conn.cursor()
-    cur.execute(
-        """
-        SELECT content, created_at
-        FROM submissions
-        WHERE candidate_name=? AND part=?
-        ORDER BY created_at DESC
-        LIMIT 1
-        """,
-        (candidate.strip(), part.strip()),
-    )
-    row = cur.fetchone()
-    conn.close()
-    if not row:
-        return None, None
-    return row[0], row[1]
+def load_part_state(candidate: str, part: str) -> Tuple[Optional[str], Optional[str], bool]:
+    candidate = candidate.strip()
+    with _LOCK:
+        content, created_at, finalized = _CONN.execute(
+            SQL_PART_STATE, (candidate, candidate, part.strip())
+        ).fetchone()
+    if finalized:
+        _FINALIZED.add(candidate)
+    return content, created_at, bool(finalized)
 
 
-def has_submission(candidate: str, part: str) -> bool:
-    content, _ = get_latest_submission(candidate, part)
-    return bool(content and content.strip())
+def submitted_parts(candidate: str) -> Set[str]:
+    with _LOCK:
+        rows = _CONN.execute(SQL_SUBMITTED_PARTS, (candidate.strip(),)).fetchall()
+    return {part for part, non_blank in rows if non_blank}
 
 
 def is_finalized(candidate: str) -> bool:
-    conn = sqlite3.connect(DB)
-    cur = conn.cursor()
-    cur.execute(
-        "SELECT 1 FROM final_submissions WHERE candidate_name=? LIMIT 1",
-        (candidate.strip(),),
-    )
-    ok = cur.fetchone() is not None
-    conn.close()
-    return ok
+    candidate = candidate.strip()
+    if candidate in _FINALIZED:
+        return True
+    with _LOCK:
+        row = _CONN.execute(SQL_IS_FINAL, (candidate,)).fetchone()
+    if row is None:
+        return False
+    _FINALIZED.add(candidate)
+    return True
 
 
 def finalize_candidate(candidate: str):
-    conn = sqlite3.connect(DB)
-    cur = conn.cursor()
-    cur.execute(
-        "INSERT OR IGNORE INTO final_submissions(candidate_name, finalized_at) VALUES (?, ?)",
-        (candidate.strip(), now_iso()),
-    )
-    conn.commit()
-    conn.close()
+    candidate = candidate.strip()
+    with _write_txn() as conn:
+        conn.execute(SQL_INS_FINAL, (candidate, now_iso()))
+    _FINALIZED.add(candidate)
 
 
 # -----------------------------
@@ -120,19 +303,102 @@ def finalize_candidate(candidate: str):
 @app.on_event("startup")
 def _startup():
     init_db()
+    # Share compiled templates between workers and restarts of the same host.
+    # The default is a per-user temp dir, which a container redeploy usually
+    # wipes; point JINJA_CACHE_DIR at a persistent volume to keep it longer.
+    templates.env.bytecode_cache = FileSystemBytecodeCache(os.getenv("JINJA_CACHE_DIR"))
+    # Compile every template now rather than on its first request
+    for name in TEMPLATE_NAMES:
+        templates.get_template(name)
+
+
+@app.on_event("shutdown")
+def _shutdown():
+    close_db()
+
+
+class _BodyTooLarge(Exception):
+    pass
+
+
+class BodySizeLimit:
+    # Plain ASGI middleware: counts request body bytes as they're received and
+    # answers 413 once max_bytes is passed, so oversized bodies are never
+    # fully read or form-parsed, with or without a Content-Length header.
+    # submit_part still checks the decoded answer length.
+
+    def __init__(self, app, max_bytes: int):
+        self.app = app
+        self.max_bytes = max_bytes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        for name, value in scope["headers"]:
+            if name == b"content-length" and value.isdigit() and int(value) > self.max_bytes:
+                await self._too_large(scope, receive, send)
+                return
+
+        received = 0
+        exceeded = False
+        response_started = False
+
+        async def limited_receive():
+            nonlocal received, exceeded
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    exceeded = True
+                    raise _BodyTooLarge()
+            return message
+
+        async def guarded_send(message):
+            nonlocal response_started
+            # Drop whatever the app made of the aborted body (FastAPI turns a
+            # failed form read into a 400); the 413 below replaces it.
+            if exceeded:
+                return
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, guarded_send)
+        except Exception:
+            if not exceeded:
+                raise
+        if exceeded and not response_started:
+            await self._too_large(scope, receive, send)
+
+    @staticmethod
+    async def _too_large(scope, receive, send):
+        response = PlainTextResponse("Request body too large.", status_code=413)
+        await response(scope, receive, send)
+
+
+app.add_middleware(BodySizeLimit, max_bytes=MAX_BODY_BYTES)
+
+
+# Routes that need a candidate depend on require_candidate; without the
+# cookie they're sent back to the start page.
+@app.exception_handler(CandidateRequired)
+async def _candidate_required(request: Request, exc: CandidateRequired):
+    return see_other("/test")
 
 
 # -----------------------------
 # Candidate + Home
 # -----------------------------
 @app.get("/", response_class=HTMLResponse)
-def root(request: Request):
-    return RedirectResponse(url="/test", status_code=303)
+async def root(request: Request):
+    return see_other("/test")
 
 
 @app.get("/test", response_class=HTMLResponse)
-def test_home(request: Request):
-    candidate = get_candidate(request)
+async def test_home(request: Request, candidate: str = Depends(get_candidate)):
     if not candidate:
         return templates.TemplateResponse(
             "index.html",
@@ -148,25 +414,25 @@ def test_home(request: Request):
         {
             "request": request,
             "candidate_name": candidate,
-            "finalized": is_finalized(candidate),
+            "finalized": await asyncio.to_thread(is_finalized, candidate),
         },
     )
 
 
 @app.post("/set-candidate")
-def set_candidate(candidate_name: str = Form(...)):
+async def set_candidate(candidate_name: str = Form(...)):
     candidate_name = (candidate_name or "").strip()
     if not candidate_name:
-        return RedirectResponse(url="/test", status_code=303)
+        return see_other("/test")
 
-    resp = RedirectResponse(url="/test", status_code=303)
+    resp = see_other("/test")
     resp.set_cookie(COOKIE_NAME, candidate_name, max_age=60 * 60 * 24 * 14)  # 14 days
     return resp
 
 
 @app.get("/change-candidate")
-def change_candidate():
-    resp = RedirectResponse(url="/test", status_code=303)
+async def change_candidate():
+    resp = see_other("/test")
     resp.delete_cookie(COOKIE_NAME)
     return resp
 
@@ -181,21 +447,28 @@ PART_MAP = {
     "d": ("D", "part_d.html"),
     "e": ("E", "part_e.html"),
 }
+# Where to send the candidate after submitting each part
+NEXT_URL = {
+    "a": "/part/b",
+    "b": "/part/c",
+    "c": "/part/d",
+    "d": "/part/e",
+    "e": "/finalize",
+}
+# Route-level validation: anything else is rejected before the handler runs
+PART_ID = Path(..., pattern="^[a-eA-E]$")
 
 
 @app.get("/part/{part_id}", response_class=HTMLResponse)
-def render_part(part_id: str, request: Request):
-    candidate = get_candidate(request)
-    if not candidate:
-        return RedirectResponse(url="/test", status_code=303)
-
-    part_id = part_id.lower().strip()
-    if part_id not in PART_MAP:
-        return RedirectResponse(url="/test", status_code=303)
-
-    part_letter, template_name = PART_MAP[part_id]
-    existing_content, existing_time = get_latest_submission(candidate, part_letter)
-    finalized = is_finalized(candidate)
+async def render_part(
+    request: Request,
+    part_id: str = PART_ID,
+    candidate: str = Depends(require_candidate),
+):
+    part_letter, template_name = PART_MAP[part_id.lower()]
+    existing_content, existing_time, finalized = await asyncio.to_thread(
+        load_part_state, candidate, part_letter
+    )
 
     return templates.TemplateResponse(
         template_name,
@@ -211,36 +484,27 @@ def render_part(part_id: str, request: Request):
 
 
 @app.post("/submit/{part_id}", response_class=HTMLResponse)
-def submit_part(part_id: str, request: Request, content: str = Form("")):
-    candidate = get_candidate(request)
-    if not candidate:
-        return RedirectResponse(url="/test", status_code=303)
-
-    part_id = part_id.lower().strip()
-    if part_id not in PART_MAP:
-        return RedirectResponse(url="/test", status_code=303)
+async def submit_part(
+    part_id: str = PART_ID,
+    content: str = Form(""),
+    candidate: str = Depends(require_candidate),
+):
+    part_id = part_id.lower()
 
     # Block resubmission after finalize
-    if is_finalized(candidate):
-        return HTMLResponse("Test already finalized. Submissions are locked.", status_code=403)
+    if await asyncio.to_thread(is_finalized, candidate):
+        return PlainTextResponse("Test already finalized. Submissions are locked.", status_code=403)
+
+    if len(content) > MAX_CONTENT_CHARS:
+        return PlainTextResponse(
+            f"Answer is too long (max {MAX_CONTENT_CHARS} characters).", status_code=413
+        )
 
     part_letter, _template = PART_MAP[part_id]
-    save_submission(candidate, part_letter, content or "")
+    await asyncio.to_thread(save_submission, candidate, part_letter, content or "")
 
     # Redirect to next part after submit
-    next_map = {
-        "a": "b",
-        "b": "c",
-        "c": "d",
-        "d": "e",
-        "e": "finalize"
-    }
-    next_step = next_map.get(part_id, "finalize")
-
-    if next_step == "finalize":
-        return RedirectResponse(url="/finalize", status_code=303)
-
-    return RedirectResponse(url=f"/part/{next_step}", status_code=303)
+    return see_other(NEXT_URL[part_id])
 
 
 
@@ -248,19 +512,11 @@ def submit_part(part_id: str, request: Request, content: str = Form("")):
 # Final Submit All
 # -----------------------------
 @app.get("/finalize", response_class=HTMLResponse)
-def finalize_page(request: Request):
-    candidate = get_candidate(request)
-    if not candidate:
-        return RedirectResponse(url="/test", status_code=303)
-
-    status = {
-        "A": has_submission(candidate, "A"),
-        "B": has_submission(candidate, "B"),
-        "C": has_submission(candidate, "C"),
-        "D": has_submission(candidate, "D"),
-    }
+async def finalize_page(request: Request, candidate: str = Depends(require_candidate)):
+    parts = await asyncio.to_thread(submitted_parts, candidate)
+    status = {p: p in parts for p in "ABCD"}
     all_done = all(status.values())
-    finalized = is_finalized(candidate)
+    finalized = await asyncio.to_thread(is_finalized, candidate)
 
     return templates.TemplateResponse(
         "finalize.html",
@@ -275,47 +531,48 @@ def finalize_page(request: Request):
 
 
 @app.post("/finalize")
-def finalize_submit(request: Request):
-    candidate = get_candidate(request)
-    if not candidate:
-        return RedirectResponse(url="/test", status_code=303)
+async def finalize_submit(candidate: str = Depends(require_candidate)):
+    # Known-finalized candidates skip both the parts query and the write
+    if candidate in _FINALIZED:
+        return see_other("/finalize")
 
-    if is_finalized(candidate):
-        return RedirectResponse(url="/finalize", status_code=303)
+    if not await asyncio.to_thread(submitted_parts, candidate) >= {"A", "B", "C", "D"}:
+        # Only consult the DB here, where a finalized candidate from another
+        # worker (or before a restart) would otherwise get a 400
+        if await asyncio.to_thread(is_finalized, candidate):
+            return see_other("/finalize")
+        return PlainTextResponse("Please submit Parts A–D before finalizing.", status_code=400)
 
-    if not all(has_submission(candidate, p) for p in ["A", "B", "C", "D"]):
-        return HTMLResponse("Please submit Parts A–D before finalizing.", status_code=400)
-
-    finalize_candidate(candidate)
-    return RedirectResponse(url="/finalize", status_code=303)
+    # INSERT OR IGNORE makes a racing second finalize a no-op
+    await asyncio.to_thread(finalize_candidate, candidate)
+    return see_other("/finalize")
 
 
 # -----------------------------
 # Admin - view submissions
 # -----------------------------
+ADMIN_STREAM_FRAGMENTS = 10
+
+
 @app.get("/admin/submissions", response_class=HTMLResponse)
-def admin_submissions(key: str):
+async def admin_submissions(key: str):
     if key != ADMIN_KEY:
-        return HTMLResponse("Unauthorized", status_code=401)
-
-    conn = sqlite3.connect(DB)
-    cur = conn.cursor()
-    cur.execute("""
-        SELECT candidate_name, part, created_at, content
-        FROM submissions
-        ORDER BY created_at DESC
-        LIMIT 200
-    """)
-    rows = cur.fetchall()
-    conn.close()
-
-    html = ["<h2>Submissions</h2>", "<p>Latest 200</p>"]
-    for cand, part, created_at, content in rows:
-        html.append("<hr/>")
-        html.append(f"<b>{cand}</b> — Part <b>{part}</b> — <small>{created_at}</small>")
-        html.append(
-            "<pre style='white-space:pre-wrap;background:#f3f4f6;padding:12px;border-radius:10px;'>"
-            + (content or "")
-            + "</pre>"
-        )
-    return HTMLResponse("".join(html))
+        return PlainTextResponse("Unauthorized", status_code=401)
+
+    # Stream rows straight off a cursor so large answers aren't all held in
+    # memory at once. It gets its own connection (WAL lets it read alongside
+    # the shared one) so the stream doesn't hold _LOCK for its whole length.
+    conn = await asyncio.to_thread(_open_reader)
+    template = templates.get_template("admin_submissions.html")
+
+    def generate():
+        try:
+            # Jinja yields ~9 small fragments per row; buffer them so each body
+            # message (and threadpool hop) carries about one row, not a fragment.
+            stream = template.stream(rows=conn.execute(SQL_ADMIN_LIST))
+            stream.enable_buffering(ADMIN_STREAM_FRAGMENTS)
+            yield from stream
+        finally:
+            conn.close()
+
+    return StreamingResponse(generate(), media_type="text/html")